@@ -1,11 +1,21 @@
 import os
+import json
+import hashlib
+import time
+import shelve
 import logging
+import functools
 import aiohttp
 import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from io import BytesIO
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from transformers import pipeline
+import torch
+import torch.nn.functional as F
+from transformers import CLIPModel, CLIPProcessor
 
 # Attempt to import discord with fallback instructions
 try:
@@ -19,6 +29,18 @@ except ImportError:
 # === Configuration ===
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+# Image encoder backend: "torch" (default), "onnx" or "openvino"
+CLIP_BACKEND = os.getenv("CLIP_BACKEND", "torch").lower()
+CLIP_BACKENDS = ("torch", "onnx", "openvino")
+CLIP_MODEL_ID = "openai/clip-vit-large-patch14"
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+# Keyed by model so a different checkpoint never reuses a stale export
+ONNX_VISUAL_PATH = os.getenv(
+    "ONNX_VISUAL_PATH",
+    os.path.join(CACHE_DIR, f"{CLIP_MODEL_ID.replace('/', '--')}-visual.onnx")
+)
+# Quantize the text tower to int8 when building the label bank (CPU only)
+CLIP_TEXT_INT8 = os.getenv("CLIP_TEXT_INT8", "0") == "1"
 
 # Initialize logging
 logging.basicConfig(
@@ -28,18 +50,194 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AstroVisionBot")
 
+if CLIP_BACKEND not in CLIP_BACKENDS:
+    logger.critical(f"Unknown CLIP_BACKEND '{CLIP_BACKEND}', expected one of {', '.join(CLIP_BACKENDS)}")
+    exit(1)
+
 # Initialize Discord bot
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+class AstroBot(commands.Bot):
+    """Bot that owns a shared HTTP session and persists cached results"""
+    http_session = None
+
+    async def start(self, *args, **kwargs):
+        # Set up before connecting, since commands can arrive before on_ready
+        if self.http_session is None or self.http_session.closed:
+            # Reused across downloads for keep-alive and DNS caching
+            self.http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=20),
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+                headers={"Accept-Encoding": "gzip"}
+            )
+        _start_batcher()
+        _load_result_cache()
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        try:
+            _save_result_cache()
+        except Exception as e:
+            logger.error(f"Failed to save result cache: {str(e)}")
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+        await super().close()
+
+bot = AstroBot(command_prefix="!", intents=intents)
 
 # Load CLIP model
-logger.info("Loading CLIP model...")
-vision_classifier = pipeline(
-    task="zero-shot-image-classification",
-    model="openai/clip-vit-large-patch14"
+def _attention_implementation() -> str:
+    """Prefer FlashAttention 2 on CUDA when installed, otherwise SDPA"""
+    if CLIP_DEVICE == "cuda":
+        try:
+            import flash_attn  # noqa: F401
+            return "flash_attention_2"
+        except ImportError:
+            pass
+    return "sdpa"
+
+# Exported backends run on CPU in fp32; the torch backend uses bf16 on CUDA
+CLIP_DEVICE = "cuda" if CLIP_BACKEND == "torch" and torch.cuda.is_available() else "cpu"
+CLIP_DTYPE = torch.bfloat16 if CLIP_DEVICE == "cuda" else torch.float32
+logger.info(f"Loading CLIP model on {CLIP_DEVICE} ({CLIP_DTYPE})...")
+clip_model = CLIPModel.from_pretrained(
+    CLIP_MODEL_ID,
+    torch_dtype=CLIP_DTYPE,
+    attn_implementation=_attention_implementation()
+).to(CLIP_DEVICE).eval()
+clip_processor = CLIPProcessor.from_pretrained(CLIP_MODEL_ID)
+
+class _VisualTower(torch.nn.Module):
+    """Image branch of CLIP, used for ONNX export"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return self.model.get_image_features(pixel_values=pixel_values)
+
+def _load_onnx_visual():
+    """Export the visual tower to ONNX (once) and open an ORT session"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("Error: onnxruntime is not installed. Please install it with:")
+        print("pip install onnx onnxruntime")
+        exit(1)
+
+    if not os.path.exists(ONNX_VISUAL_PATH):
+        logger.info(f"Exporting CLIP visual tower to {ONNX_VISUAL_PATH}...")
+        dummy_image = torch.randn(1, 3, 224, 224)
+        os.makedirs(os.path.dirname(ONNX_VISUAL_PATH) or ".", exist_ok=True)
+        # Export to a temp file first so an interrupted export is never reused
+        tmp_path = f"{ONNX_VISUAL_PATH}.{os.getpid()}.tmp"
+        try:
+            torch.onnx.export(
+                _VisualTower(clip_model), dummy_image, tmp_path,
+                input_names=["pixel_values"],
+                output_names=["image_embeds"],
+                dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+                opset_version=17
+            )
+            os.replace(tmp_path, ONNX_VISUAL_PATH)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    available = ort.get_available_providers()
+    providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+    return ort.InferenceSession(ONNX_VISUAL_PATH, options, providers=providers)
+
+def _load_openvino_visual():
+    """Convert the visual tower to OpenVINO IR and compile it for CPU"""
+    try:
+        import openvino as ov
+    except ImportError:
+        print("Error: openvino is not installed. Please install it with:")
+        print("pip install openvino")
+        exit(1)
+
+    logger.info("Compiling CLIP visual tower with OpenVINO...")
+    ov_model = ov.convert_model(
+        _VisualTower(clip_model),
+        example_input=torch.randn(1, 3, 224, 224)
+    )
+    return ov.Core().compile_model(
+        ov_model, device_name="CPU", config={"PERFORMANCE_HINT": "LATENCY"}
+    )
+
+class _TextTower(torch.nn.Module):
+    """Text branch of CLIP, used for int8 quantization"""
+    def __init__(self, model):
+        super().__init__()
+        self.text_model = model.text_model
+        self.text_projection = model.text_projection
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.text_model(input_ids=input_ids, attention_mask=attention_mask)
+        return self.text_projection(outputs.pooler_output)
+
+def _load_text_encoder():
+    """Return the text encoder, dynamically quantized to int8 when enabled"""
+    if CLIP_TEXT_INT8 and CLIP_DEVICE == "cpu":
+        logger.info("Quantizing CLIP text tower to int8...")
+        return torch.ao.quantization.quantize_dynamic(
+            _TextTower(clip_model), {torch.nn.Linear}, dtype=torch.qint8
+        )
+    if CLIP_TEXT_INT8:
+        logger.warning("CLIP_TEXT_INT8 is only supported on CPU, using full precision")
+    return _TextTower(clip_model)
+
+onnx_visual = _load_onnx_visual() if CLIP_BACKEND == "onnx" else None
+openvino_visual = _load_openvino_visual() if CLIP_BACKEND == "openvino" else None
+
+def _compile_torch_visual():
+    """Wrap the visual tower with torch.compile, falling back to eager mode"""
+    try:
+        return torch.compile(_VisualTower(clip_model), mode="reduce-overhead")
+    except Exception as e:
+        logger.warning(f"torch.compile unavailable, using eager mode: {str(e)}")
+        return None
+
+torch_visual = _compile_torch_visual() if CLIP_BACKEND == "torch" else None
+
+# Largest number of images encoded in one forward pass
+BATCH_MAX_SIZE = 8
+# Reusable pinned host buffer for a full batch (safe: inference runs on one worker)
+pinned_pixels = (
+    torch.empty((BATCH_MAX_SIZE, 3, 224, 224), dtype=CLIP_DTYPE).pin_memory()
+    if CLIP_DEVICE == "cuda" else None
 )
-logger.info("Vision model loaded successfully")
+
+def encode_image(pixel_values: torch.Tensor) -> torch.Tensor:
+    """Run the CLIP image encoder on preprocessed pixels"""
+    global torch_visual
+    if onnx_visual is not None:
+        outputs = onnx_visual.run(None, {"pixel_values": pixel_values.numpy()})
+        return torch.from_numpy(outputs[0])
+    if openvino_visual is not None:
+        outputs = openvino_visual([pixel_values.numpy()])
+        return torch.from_numpy(outputs[openvino_visual.output(0)])
+    if pinned_pixels is not None and pixel_values.shape[0] <= pinned_pixels.shape[0]:
+        # Cast into pinned memory on the host so the host-to-device copy is a direct DMA
+        staging = pinned_pixels[:pixel_values.shape[0]]
+        staging.copy_(pixel_values)
+        pixel_values = staging.to(CLIP_DEVICE, non_blocking=True)
+    else:
+        pixel_values = pixel_values.to(CLIP_DEVICE, dtype=CLIP_DTYPE)
+    with torch.no_grad():
+        if torch_visual is not None:
+            try:
+                return torch_visual(pixel_values)
+            except Exception as e:
+                logger.warning(f"Compiled model failed, falling back to eager mode: {str(e)}")
+                torch_visual = None
+        return clip_model.get_image_features(pixel_values=pixel_values)
+
+logger.info(f"Vision model loaded successfully ({CLIP_BACKEND} backend)")
 
 # === Astronomy Labels ===
 # All 88 modern constellations according to IAU
@@ -96,18 +294,303 @@ ASTRONOMY_LABELS = {
 ASTRONOMY_LABELS["constellations"] = [f"{c} constellation" for c in ASTRONOMY_LABELS["constellations"]]
 ASTRONOMY_LABELS["stars"] = [f"{s} star" for s in ASTRONOMY_LABELS["stars"]]
 
+# Flatten all labels so they can be scored in a single forward pass
+# Labels are stored as parallel arrays: label text and owning category id
+CATEGORY_NAMES = list(ASTRONOMY_LABELS)
+flat_labels = [lbl for lbls in ASTRONOMY_LABELS.values() for lbl in lbls]
+cat_ids = torch.tensor(
+    [cat_id for cat_id, lbls in enumerate(ASTRONOMY_LABELS.values()) for _ in lbls],
+    dtype=torch.int8
+)
+num_cats = len(CATEGORY_NAMES)
+
+# One coarse prompt per category, used to skip categories that clearly don't apply
+CATEGORY_ANCHORS = {
+    "constellations": "a photo of a constellation in the night sky",
+    "stars": "a photo of a bright star in the night sky",
+    "deep_sky": "a telescope photo of a galaxy or nebula",
+    "planets": "a photo of a planet",
+    "moon_phases": "a photo of the moon",
+    "solar_system": "a photo of an object in the solar system",
+    "space_objects": "an illustration of an exotic object in space"
+}
+COARSE_THRESHOLD = 0.18  # minimum cosine similarity to a category anchor
+
+LABEL_PROMPTS = [f"a photo of {lbl}" for lbl in flat_labels]
+ANCHOR_PROMPTS = [CATEGORY_ANCHORS[cat] for cat in CATEGORY_NAMES]
+BANK_PROMPTS = LABEL_PROMPTS + ANCHOR_PROMPTS
+PROMPT_MAX_LENGTH = 20  # longest prompt is well under this many CLIP tokens
+# Token cache depends only on tokenizer inputs, so it survives text-bank rebuilds
+PROMPT_TOKENS_KEY = hashlib.sha256(
+    json.dumps([CLIP_MODEL_ID, PROMPT_MAX_LENGTH, BANK_PROMPTS]).encode()
+).hexdigest()
+LABEL_BANK_KEY = hashlib.sha256(
+    json.dumps([CLIP_MODEL_ID, CLIP_TEXT_INT8, BANK_PROMPTS]).encode()
+).hexdigest()
+
+def _tokenize_prompts() -> dict:
+    """Tokenize the label and anchor prompts once and persist the padded tensors"""
+    cache_path = os.path.join(CACHE_DIR, "prompts.pt")
+    if os.path.exists(cache_path):
+        cached = torch.load(cache_path, map_location="cpu")
+        if cached.get("key") == PROMPT_TOKENS_KEY:
+            return {"input_ids": cached["ids"], "attention_mask": cached["mask"]}
+
+    tokenizer = clip_processor.tokenizer
+    encoded = tokenizer(BANK_PROMPTS)
+    longest = max(len(ids) for ids in encoded["input_ids"])
+    if longest > PROMPT_MAX_LENGTH:
+        raise ValueError(
+            f"Label prompt is {longest} tokens, raise PROMPT_MAX_LENGTH ({PROMPT_MAX_LENGTH})"
+        )
+    inputs = tokenizer.pad(
+        encoded,
+        padding="max_length",
+        max_length=PROMPT_MAX_LENGTH,
+        return_tensors="pt"
+    )
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    torch.save({
+        "key": PROMPT_TOKENS_KEY,
+        "ids": inputs["input_ids"],
+        "mask": inputs["attention_mask"]
+    }, cache_path)
+    return {"input_ids": inputs["input_ids"], "attention_mask": inputs["attention_mask"]}
+
+@functools.lru_cache(maxsize=None)
+def _build_text_bank() -> tuple:
+    """
+    Encode every label and anchor prompt once, normalized for cosine similarity.
+    The result is persisted to disk, keyed by model and prompt list.
+    Returns (label_features, anchor_features).
+    """
+    cache_path = os.path.join(CACHE_DIR, "text_bank.pt")
+    if os.path.exists(cache_path):
+        cached = torch.load(cache_path, map_location="cpu")
+        if cached.get("key") == LABEL_BANK_KEY:
+            logger.info(f"Loaded {len(flat_labels)} label embeddings from {cache_path}")
+            return (
+                cached["text_features"].to(CLIP_DEVICE, dtype=torch.float32),
+                cached["anchor_features"].to(CLIP_DEVICE, dtype=torch.float32)
+            )
+
+    logger.info(f"Encoding {len(flat_labels)} astronomy labels...")
+    with torch.no_grad():
+        text_inputs = {k: v.to(CLIP_DEVICE) for k, v in _tokenize_prompts().items()}
+        # Kept in fp32: the similarity matmuls are tiny and bf16 would round the logits
+        bank_features = F.normalize(_load_text_encoder()(**text_inputs).float(), dim=-1)
+    text_features = bank_features[:len(flat_labels)]
+    anchor_features = bank_features[len(flat_labels):]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    torch.save({
+        "key": LABEL_BANK_KEY,
+        "text_features": text_features.cpu(),
+        "anchor_features": anchor_features.cpu()
+    }, cache_path)
+    logger.info("Label embeddings ready")
+    return text_features, anchor_features
+
 # === Vision Processing ===
-async def download_image(url: str) -> Image.Image:
-    """Download image asynchronously"""
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as session:
+# Decoding/preprocessing runs in parallel; inference is serialized on one worker
+cpu_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="astro-cpu")
+inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="astro-infer")
+# Ask the CDN for the smallest encodings first
+IMAGE_REQUEST_HEADERS = {"Accept": "image/webp,image/jpeg,image/*;q=0.8"}
+
+async def download_image(url: str) -> tuple:
+    """
+    Stream an image over the bot's shared session, hashing chunks as they arrive
+    Returns (content digest, raw image bytes)
+    """
+    image_data = bytearray()
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        async with bot.http_session.get(url, headers=IMAGE_REQUEST_HEADERS) as response:
+            if response.status != 200:
+                raise ValueError(f"Image download failed (HTTP {response.status})")
+            async for chunk in response.content.iter_chunked(65536):
+                image_data += chunk
+                hasher.update(chunk)
+    except asyncio.TimeoutError:
+        raise ValueError("Image download timed out")
+    return hasher.hexdigest(), image_data
+
+def _prepare_image(image_data: bytes) -> torch.Tensor:
+    """Decode image bytes and convert them to CLIP pixel values"""
+    try:
+        image = Image.open(BytesIO(image_data))
+        image.load()
+    except OSError:
+        raise ValueError("Downloaded file is not a supported image")
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return clip_processor(images=image, return_tensors="pt")["pixel_values"].contiguous()
+
+# Classification results, keyed by scoring config + image identity. Keys are
+# content-addressed (Discord attachment path or hash of the bytes), so a changed
+# image always gets a new key and entries never go stale
+RESULT_CACHE_SIZE = 256
+RESULT_KEY_PREFIX = f"{LABEL_BANK_KEY}:{COARSE_THRESHOLD}"
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, "results")
+_result_cache = OrderedDict()
+_result_cache_loaded = False  # never overwrite the saved cache before reading it
+
+def _url_result_key(url: str):
+    """Discord attachment URLs are content-addressed; other URLs may change"""
+    parts = urlsplit(url)
+    if parts.hostname in ("cdn.discordapp.com", "media.discordapp.net"):
+        # Drop the expiring signature query string
+        return f"{RESULT_KEY_PREFIX}:url:{parts.hostname}{parts.path}"
+    return None
+
+def _content_result_key(digest: str) -> str:
+    return f"{RESULT_KEY_PREFIX}:blake2b:{digest}"
+
+def _get_cached_result(key: str):
+    entry = _result_cache.get(key)
+    if entry is None:
+        return None
+    _result_cache.move_to_end(key)
+    return entry[1]
+
+def _cache_result(key: str, results: dict):
+    # The timestamp restores LRU order after a restart
+    _result_cache[key] = (time.time(), results)
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+def _load_result_cache():
+    """Restore cached results saved by a previous run"""
+    global _result_cache_loaded
+    _result_cache_loaded = True
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        with shelve.open(RESULT_CACHE_PATH, flag="c") as db:
+            entries = sorted(db.items(), key=lambda item: item[1][0])
+    except Exception as e:
+        logger.warning(f"Could not read result cache, starting empty: {str(e)}")
+        return
+    for key, entry in entries:
+        _result_cache[key] = entry
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+    logger.info(f"Restored {len(_result_cache)} cached classifications")
+
+def _save_result_cache():
+    """Persist cached results for a warm restart"""
+    if not _result_cache_loaded:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with shelve.open(RESULT_CACHE_PATH, flag="n") as db:
+        db.update(_result_cache)
+
+# Category id per label, kept on the model device for scoring
+_cat_index = cat_ids.long().to(CLIP_DEVICE)
+
+def _score_batch(pixel_values: torch.Tensor) -> list:
+    """Encode a batch of images once and score each against the relevant cached labels"""
+    text_features, anchor_features = _build_text_bank()
+    image_features = encode_image(pixel_values).to(CLIP_DEVICE, dtype=torch.float32)
+    with torch.no_grad():
+        image_features = F.normalize(image_features, dim=-1)
+
+        # Coarse gate: keep categories whose anchor is similar enough (and always the best one)
+        coarse = image_features @ anchor_features.T
+        keep = (coarse > COARSE_THRESHOLD) | (coarse == coarse.max(dim=1, keepdim=True).values)
+        label_ids = keep.any(dim=0)[_cat_index].nonzero().squeeze(1)
+
+        logit_scale = clip_model.logit_scale.float().exp()
+        logits = logit_scale * image_features @ text_features[label_ids].T
+
+        # Per-category softmax + argmax over the flat label axis, without Python loops
+        batch_size, num_labels = logits.shape
+        index = _cat_index[label_ids].expand(batch_size, num_labels)
+        best = torch.full((batch_size, num_cats), float("-inf"), device=CLIP_DEVICE)
+        best.scatter_reduce_(1, index, logits, reduce="amax")
+        best_per_label = best.gather(1, index)
+        denom = torch.zeros(batch_size, num_cats, device=CLIP_DEVICE)
+        denom.scatter_add_(1, index, (logits - best_per_label).exp())
+        positions = torch.where(
+            logits == best_per_label,
+            torch.arange(num_labels, device=CLIP_DEVICE).expand(batch_size, num_labels),
+            num_labels
+        )
+        best_idx = torch.full((batch_size, num_cats), num_labels, device=CLIP_DEVICE)
+        best_idx.scatter_reduce_(1, index, positions, reduce="amin")
+        # The winning label contributes exp(0) to its category's denominator
+        scores = denom.reciprocal()
+
+    # Only the small [batch, categories] results leave the device
+    active_labels = [flat_labels[i] for i in label_ids.tolist()]
+    return [
+        {
+            CATEGORY_NAMES[cat_id]: {"label": active_labels[idx], "score": score}
+            for cat_id, (idx, score, kept) in enumerate(zip(row_idx, row_scores, row_keep))
+            if kept
+        }
+        for row_idx, row_scores, row_keep in zip(best_idx.tolist(), scores.tolist(), keep.tolist())
+    ]
+
+def _warmup_model():
+    """Run dummy classifications so the first requests skip compilation"""
+    dummy = clip_processor(images=Image.new("RGB", (224, 224)), return_tensors="pt")["pixel_values"]
+    # Only compiled CUDA graphs are captured per batch size; other backends need one pass
+    sizes = range(1, BATCH_MAX_SIZE + 1) if torch_visual is not None and CLIP_DEVICE == "cuda" else [1]
+    for batch_size in sizes:
+        _score_batch(dummy.expand(batch_size, -1, -1, -1).contiguous())
+
+# === Request Batching ===
+# Concurrent requests are coalesced into one forward pass of up to BATCH_MAX_SIZE
+BATCH_MAX_WAIT = 0.05  # seconds
+inference_queue = None  # created by AstroBot.start, once the event loop is running
+batcher_task = None
+
+def _on_batcher_done(task):
+    """Log loudly if the batcher stops, since queued requests would never finish"""
+    if task.cancelled():
+        logger.warning("Batcher task was cancelled")
+    elif task.exception() is not None:
+        logger.critical(f"Batcher task crashed: {str(task.exception())}")
+    else:
+        logger.critical("Batcher task exited unexpectedly")
+
+def _start_batcher():
+    """Create the request queue and start the batcher on the running loop"""
+    global inference_queue, batcher_task
+    if batcher_task is None or batcher_task.done():
+        inference_queue = asyncio.Queue()
+        batcher_task = asyncio.get_running_loop().create_task(batcher())
+        batcher_task.add_done_callback(_on_batcher_done)
+
+async def batcher():
+    """Collect queued images and run them through the encoder together"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await inference_queue.get()]
+        deadline = loop.time() + BATCH_MAX_WAIT
+        while len(batch) < BATCH_MAX_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(inference_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        pixel_values = torch.cat([pixels for pixels, _ in batch])
         try:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise ValueError(f"Image download failed (HTTP {response.status})")
-                image_data = await response.read()
-                return Image.open(BytesIO(image_data)).convert("RGB")
-        except asyncio.TimeoutError:
-            raise ValueError("Image download timed out")
+            batch_results = await loop.run_in_executor(inference_pool, _score_batch, pixel_values)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), results in zip(batch, batch_results):
+            if not future.done():
+                future.set_result(results)
 
 async def classify_astronomy_image(image_url: str) -> dict:
     """
@@ -115,42 +598,25 @@ async def classify_astronomy_image(image_url: str) -> dict:
     Returns dictionary with classification results
     """
     try:
-        image = await download_image(image_url)
-        results = {}
-        
-        # Classify all categories
-        for category, labels in ASTRONOMY_LABELS.items():
-            # Skip categories with too many labels for performance
-            if len(labels) > 100:  # Constellations have 88
-                # Process in chunks
-                chunk_size = 30
-                category_results = []
-                for i in range(0, len(labels), chunk_size):
-                    chunk = labels[i:i+chunk_size]
-                    chunk_results = await asyncio.get_event_loop().run_in_executor(
-                        None, vision_classifier, image, chunk
-                    )
-                    if chunk_results:
-                        category_results.extend(chunk_results)
-                
-                # Find best result from chunks
-                if category_results:
-                    best_result = max(category_results, key=lambda x: x['score'])
-                    results[category] = {
-                        "label": best_result['label'],
-                        "score": best_result['score']
-                    }
-            else:
-                # Run classification for smaller categories
-                category_results = await asyncio.get_event_loop().run_in_executor(
-                    None, vision_classifier, image, labels
-                )
-                if category_results:
-                    results[category] = {
-                        "label": category_results[0]['label'],
-                        "score": category_results[0]['score']
-                    }
-        
+        loop = asyncio.get_running_loop()
+        result_key = _url_result_key(image_url)
+        content_addressed = result_key is not None
+        if content_addressed:
+            results = _get_cached_result(result_key)
+            if results is not None:
+                return results
+
+        digest, image_data = await download_image(image_url)
+        if not content_addressed:
+            result_key = _content_result_key(digest)
+            results = _get_cached_result(result_key)
+            if results is not None:
+                return results
+        pixel_values = await loop.run_in_executor(cpu_pool, _prepare_image, image_data)
+        future = loop.create_future()
+        await inference_queue.put((pixel_values, future))
+        results = await future
+        _cache_result(result_key, results)
         return results
     
     except Exception as e:
@@ -213,9 +679,20 @@ async def astro_vision(ctx, image_url: str = None):
         await ctx.reply(f"🔴 Vision analysis failed: {str(e)}")
 
 # === Bot Events ===
+_warmed_up = False
+
 @bot.event
 async def on_ready():
+    global _warmed_up
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    if not _warmed_up:
+        _warmed_up = True
+        # The batcher is already running; queued requests wait behind the warmup on inference_pool
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(inference_pool, _build_text_bank)
+        logger.info("Warming up vision model...")
+        await loop.run_in_executor(inference_pool, _warmup_model)
+        logger.info("Vision model warm")
     await bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,